@@ -4,9 +4,33 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
+def _scroll_canvas(event):
+    """Прокрутка Canvas колесом мыши (Canvas - первый bindtag виджета)"""
+    canvas = event.widget.nametowidget(event.widget.bindtags()[0])
+    step = -1 if event.num == 4 or event.delta > 0 else 1
+    canvas.yview_scroll(step, 'units')
+
 class SSHConfiguratorGUI:
+    # Значения полей интерфейса, если директива отсутствует в sshd_config
+    UI_DEFAULTS = {
+        'Port': '22',
+        'PermitRootLogin': 'prohibit-password',
+        'PasswordAuthentication': 'yes',
+        'PubkeyAuthentication': 'yes',
+        'X11Forwarding': 'yes',
+        'MaxAuthTries': '6',
+        'LoginGraceTime': '120',
+        'ClientAliveInterval': '0',
+        'AllowUsers': '',
+        'AllowGroups': '',
+    }
+    
     def __init__(self, root, ssh_manager, presets):
         """
         Инициализация графического интерфейса
@@ -22,11 +46,45 @@ class SSHConfiguratorGUI:
         
         # Переменные для хранения данных
         self.current_config = None
-        self.backup_list = []
+        # Кэш отображаемой конфигурации: (id словаря, текст)
+        self._config_display_cache = None
+        # Строки бэкапов, загруженные до открытия вкладки: путь -> значения
+        self._pending_backup_rows = {}
+        # Кэш строк Treeview бэкапов: путь -> (iid, значения строки)
+        self._backup_rows = {}
+        
+        # Общий пул потоков для фоновых операций с менеджером
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ssh-gui')
+        # Имена пользовательских операций, которые сейчас выполняются
+        self._busy = set()
+        # Сообщение статусной строки, ожидающее отрисовки
+        self._pending_status = None
+        self._status_lock = threading.Lock()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Периодический опрос статуса службы и списка бэкапов (мс)
+        self._poll_interval = 2000
+        # Не более одной проверки статуса и одного обновления бэкапов одновременно
+        self._status_check_pending = False
+        self._refresh_pending = False
         
         # Создаем интерфейс
         self.setup_ui()
         
+        # Сеттеры переменных интерфейса по ключам настроек sshd
+        self._ui_setters = {
+            'Port': lambda v: self._set_if_changed(self.port_var, v),
+            'PermitRootLogin': lambda v: self._set_if_changed(self.root_login_var, v),
+            'PasswordAuthentication': lambda v: self._set_if_changed(self.password_auth_var, v == 'yes'),
+            'PubkeyAuthentication': lambda v: self._set_if_changed(self.pubkey_auth_var, v == 'yes'),
+            'X11Forwarding': lambda v: self._set_if_changed(self.x11_var, v),
+            'MaxAuthTries': lambda v: self._set_if_changed(self.max_auth_var, v),
+            'LoginGraceTime': lambda v: self._set_if_changed(self.login_grace_var, v),
+            'ClientAliveInterval': lambda v: self._set_if_changed(self.keepalive_var, v),
+            'AllowUsers': lambda v: self._set_if_changed(self.allowed_users_var, v),
+            'AllowGroups': lambda v: self._set_if_changed(self.allowed_groups_var, v),
+        }
+        
         # Загружаем данные
         self.load_data()
     
@@ -38,6 +96,9 @@ class SSHConfiguratorGUI:
         # Создаем стили
         self.setup_styles()
         
+        # Создаем переменные интерфейса
+        self.create_variables()
+        
         # Создаем вкладки
         self.create_notebook()
         
@@ -65,57 +126,75 @@ class SSHConfiguratorGUI:
                        font=('Helvetica', 9),
                        background='#e0e0e0')
     
+    def create_variables(self):
+        """Создание переменных Tk, общих для всех вкладок"""
+        # Основные настройки
+        self.port_var = tk.StringVar(value='22')
+        self.root_login_var = tk.StringVar(value='prohibit-password')
+        self.password_auth_var = tk.BooleanVar(value=True)
+        self.pubkey_auth_var = tk.BooleanVar(value=True)
+        self.x11_var = tk.StringVar(value='yes')
+        
+        # Безопасность
+        self.max_auth_var = tk.StringVar(value='6')
+        self.login_grace_var = tk.StringVar(value='120')
+        self.keepalive_var = tk.StringVar(value='0')
+        self.allowed_users_var = tk.StringVar()
+        self.allowed_groups_var = tk.StringVar()
+        
+        # Статус
+        self.service_status_var = tk.StringVar(value='Проверка...')
+        
+        # Виджеты вкладок, которые еще не открывались
+        self.backup_tree = None
+        self.config_text = None
+    
     def create_notebook(self):
         """Создание вкладок интерфейса"""
         # Создаем Notebook (панель вкладок)
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # Создаем вкладки
-        self.create_basic_tab()
-        self.create_security_tab()
-        self.create_presets_tab()
-        self.create_backups_tab()
-        self.create_status_tab()
+        # Вкладки создаются пустыми, содержимое строится при первом открытии
+        self._tab_builders = {}
+        for text, builder in (('Основные', self.create_basic_tab),
+                              ('Безопасность', self.create_security_tab),
+                              ('Пресеты', self.create_presets_tab),
+                              ('Бэкапы', self.create_backups_tab),
+                              ('Статус', self.create_status_tab)):
+            tab = ttk.Frame(self.notebook)
+            self.notebook.add(tab, text=text)
+            self._tab_builders[str(tab)] = builder
+        
+        self.notebook.bind('<<NotebookTabChanged>>', self._maybe_build_tab)
+        self._maybe_build_tab()
+    
+    def _maybe_build_tab(self, event=None):
+        """Построение содержимого выбранной вкладки при первом открытии"""
+        tab_id = self.notebook.select()
+        builder = self._tab_builders.pop(tab_id, None)
+        if builder:
+            builder(self.notebook.nametowidget(tab_id))
     
-    def create_basic_tab(self):
+    def create_basic_tab(self, tab):
         """Вкладка основных настроек"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text='Основные')
-        
-        # Фрейм с прокруткой
-        canvas = tk.Canvas(tab, bg='#f0f0f0', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tab, orient='vertical', command=canvas.yview)
-        scroll_frame = ttk.Frame(canvas)
-        
-        scroll_frame.bind(
-            '<Configure>',
-            lambda e: canvas.configure(scrollregion=canvas.bbox('all'))
-        )
-        
-        canvas.create_window((0, 0), window=scroll_frame, anchor='nw')
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side='left', fill='both', expand=True, padx=(0, 5))
-        scrollbar.pack(side='right', fill='y')
+        content = self._make_scroll_frame(tab)
         
         # Заголовок
-        ttk.Label(scroll_frame, text='Основные настройки SSH',
+        ttk.Label(content, text='Основные настройки SSH',
                  style='Title.TLabel').pack(pady=(10, 20))
         
         # Порт SSH
-        port_frame = ttk.LabelFrame(scroll_frame, text='Порт SSH', padding=10)
+        port_frame = ttk.LabelFrame(content, text='Порт SSH', padding=10)
         port_frame.pack(fill='x', padx=10, pady=5)
         
-        self.port_var = tk.StringVar(value='22')
         ttk.Label(port_frame, text='Порт:').pack(side='left', padx=(0, 10))
         ttk.Entry(port_frame, textvariable=self.port_var, width=10).pack(side='left')
         
         # Доступ root
-        root_frame = ttk.LabelFrame(scroll_frame, text='Доступ для root', padding=10)
+        root_frame = ttk.LabelFrame(content, text='Доступ для root', padding=10)
         root_frame.pack(fill='x', padx=10, pady=5)
         
-        self.root_login_var = tk.StringVar(value='prohibit-password')
         options = ['yes', 'no', 'prohibit-password', 'without-password']
         for option in options:
             ttk.Radiobutton(root_frame, text=option, 
@@ -123,111 +202,135 @@ class SSHConfiguratorGUI:
                            value=option).pack(anchor='w')
         
         # Методы аутентификации
-        auth_frame = ttk.LabelFrame(scroll_frame, text='Методы аутентификации', padding=10)
+        auth_frame = ttk.LabelFrame(content, text='Методы аутентификации', padding=10)
         auth_frame.pack(fill='x', padx=10, pady=5)
         
-        self.password_auth_var = tk.BooleanVar(value=True)
-        self.pubkey_auth_var = tk.BooleanVar(value=True)
-        
         ttk.Checkbutton(auth_frame, text='Парольная аутентификация',
                        variable=self.password_auth_var).pack(anchor='w')
         ttk.Checkbutton(auth_frame, text='Аутентификация по ключу',
                        variable=self.pubkey_auth_var).pack(anchor='w')
         
         # X11 Forwarding
-        x11_frame = ttk.LabelFrame(scroll_frame, text='X11 Forwarding', padding=10)
+        x11_frame = ttk.LabelFrame(content, text='X11 Forwarding', padding=10)
         x11_frame.pack(fill='x', padx=10, pady=5)
         
-        self.x11_var = tk.StringVar(value='yes')
         ttk.Radiobutton(x11_frame, text='Включить', 
                        variable=self.x11_var, value='yes').pack(anchor='w')
         ttk.Radiobutton(x11_frame, text='Отключить', 
                        variable=self.x11_var, value='no').pack(anchor='w')
         
         # Кнопка сохранения
-        ttk.Button(scroll_frame, text='Сохранить настройки',
+        ttk.Button(content, text='Сохранить настройки',
                   command=self.save_basic_settings).pack(pady=20)
+
     
-    def create_security_tab(self):
+    def create_security_tab(self, tab):
         """Вкладка настроек безопасности"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text='Безопасность')
-        
-        canvas = tk.Canvas(tab, bg='#f0f0f0', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tab, orient='vertical', command=canvas.yview)
-        scroll_frame = ttk.Frame(canvas)
-        
-        scroll_frame.bind(
-            '<Configure>',
-            lambda e: canvas.configure(scrollregion=canvas.bbox('all'))
-        )
-        
-        canvas.create_window((0, 0), window=scroll_frame, anchor='nw')
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side='left', fill='both', expand=True, padx=(0, 5))
-        scrollbar.pack(side='right', fill='y')
+        content = self._make_scroll_frame(tab)
         
         # Заголовок
-        ttk.Label(scroll_frame, text='Настройки безопасности',
+        ttk.Label(content, text='Настройки безопасности',
                  style='Title.TLabel').pack(pady=(10, 20))
         
         # Максимальное количество попыток
-        frame1 = ttk.Frame(scroll_frame)
+        frame1 = ttk.Frame(content)
         frame1.pack(fill='x', padx=10, pady=5)
         
         ttk.Label(frame1, text='Максимальное количество попыток входа:',
                  width=35).pack(side='left')
-        self.max_auth_var = tk.StringVar(value='6')
         ttk.Entry(frame1, textvariable=self.max_auth_var, width=10).pack(side='left')
         
         # Время ожидания аутентификации
-        frame2 = ttk.Frame(scroll_frame)
+        frame2 = ttk.Frame(content)
         frame2.pack(fill='x', padx=10, pady=5)
         
         ttk.Label(frame2, text='Время ожидания аутентификации (секунды):',
                  width=35).pack(side='left')
-        self.login_grace_var = tk.StringVar(value='120')
         ttk.Entry(frame2, textvariable=self.login_grace_var, width=10).pack(side='left')
         
         # Интервал Keep Alive
-        frame3 = ttk.Frame(scroll_frame)
+        frame3 = ttk.Frame(content)
         frame3.pack(fill='x', padx=10, pady=5)
         
         ttk.Label(frame3, text='Интервал Keep Alive (секунды):',
                  width=35).pack(side='left')
-        self.keepalive_var = tk.StringVar(value='0')
         ttk.Entry(frame3, textvariable=self.keepalive_var, width=10).pack(side='left')
         
         # Разрешенные пользователи
-        frame4 = ttk.Frame(scroll_frame)
+        frame4 = ttk.Frame(content)
         frame4.pack(fill='x', padx=10, pady=5)
         
         ttk.Label(frame4, text='Разрешенные пользователи:').pack(anchor='w')
-        self.allowed_users_var = tk.StringVar()
         ttk.Entry(frame4, textvariable=self.allowed_users_var, 
                  width=50).pack(fill='x', pady=(5, 0))
         ttk.Label(frame4, text='(через пробел)', font=('Helvetica', 9)).pack(anchor='w')
         
         # Разрешенные группы
-        frame5 = ttk.Frame(scroll_frame)
+        frame5 = ttk.Frame(content)
         frame5.pack(fill='x', padx=10, pady=5)
         
         ttk.Label(frame5, text='Разрешенные группы:').pack(anchor='w')
-        self.allowed_groups_var = tk.StringVar()
         ttk.Entry(frame5, textvariable=self.allowed_groups_var, 
                  width=50).pack(fill='x', pady=(5, 0))
         ttk.Label(frame5, text='(через пробел)', font=('Helvetica', 9)).pack(anchor='w')
         
         # Кнопка сохранения
-        ttk.Button(scroll_frame, text='Сохранить настройки безопасности',
+        ttk.Button(content, text='Сохранить настройки безопасности',
                   command=self.save_security_settings).pack(pady=20)
+
     
-    def create_presets_tab(self):
-        """Вкладка с пресетами настроек"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text='Пресеты')
+    def _make_scroll_frame(self, parent):
+        """
+        Создание фрейма для содержимого вкладки
+        
+        Содержимое вкладок статично, поэтому прокрутка подключается только
+        при нехватке места на экране, после заполнения фрейма.
+        
+        Args:
+            parent: Фрейм вкладки
+            
+        Returns:
+            ttk.Frame: Фрейм для виджетов вкладки
+        """
+        content = ttk.Frame(parent)
+        content.pack(fill='both', expand=True)
+        self.root.after_idle(self._enable_scroll_if_needed, parent, content)
+        return content
+    
+    def _enable_scroll_if_needed(self, tab, content):
+        """Подключение прокрутки, если содержимое вкладки не помещается на экран"""
+        self.root.update_idletasks()
+        if content.winfo_reqheight() <= self.root.winfo_screenheight():
+            return
+        
+        canvas = tk.Canvas(tab, bg='#f0f0f0', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(tab, orient='vertical', command=canvas.yview)
+        canvas.configure(yscrollcommand=scrollbar.set)
         
+        content.pack_forget()
+        canvas.pack(side='left', fill='both', expand=True, padx=(0, 5))
+        scrollbar.pack(side='right', fill='y')
+        
+        # Содержимое не меняется, поэтому область прокрутки задается один раз
+        canvas.create_window((0, 0), window=content, anchor='nw')
+        canvas.configure(scrollregion=(0, 0, content.winfo_reqwidth(),
+                                       content.winfo_reqheight()))
+        content.lift(canvas)
+        
+        # Колесо мыши над любым виджетом вкладки прокручивает Canvas:
+        # путь Canvas ставится первым bindtag, и виджеты наследуют его привязки
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            canvas.bind(sequence, _scroll_canvas)
+        
+        tag = str(canvas)
+        widgets = [content]
+        while widgets:
+            widget = widgets.pop()
+            widget.bindtags((tag,) + widget.bindtags())
+            widgets.extend(widget.winfo_children())
+    
+    def create_presets_tab(self, tab):
+        """Вкладка с пресетами настроек"""
         # Заголовок
         ttk.Label(tab, text='Готовые пресеты настроек',
                  style='Title.TLabel').pack(pady=(10, 20))
@@ -239,12 +342,19 @@ class SSHConfiguratorGUI:
         ttk.Label(frame1, text='Выберите пресет:').pack(side='left', padx=(0, 10))
         self.preset_var = tk.StringVar()
         
-        preset_names = []
-        for key, preset in self.presets.items():
-            preset_names.append(f"{preset['name']} ({key})")
+        # Подпись в списке -> объект пресета
+        self._preset_by_label = {f"{preset['name']} ({key})": preset
+                                 for key, preset in self.presets.items()}
+        # Пресеты не меняются во время работы, поэтому текст предпросмотра
+        # форматируется один раз при построении вкладки
+        self._preset_preview_cache = {
+            label: "".join(f"{key}: {value}\n" for key, value in preset['settings'].items())
+            for label, preset in self._preset_by_label.items()
+        }
         
         self.preset_combo = ttk.Combobox(frame1, textvariable=self.preset_var,
-                                        values=preset_names, state='readonly', width=40)
+                                        values=list(self._preset_by_label),
+                                        state='readonly', width=40)
         self.preset_combo.pack(side='left')
         self.preset_combo.bind('<<ComboboxSelected>>', self.on_preset_selected)
         
@@ -274,11 +384,8 @@ class SSHConfiguratorGUI:
         ttk.Button(frame4, text='Загрузить в основные настройки',
                   command=self.load_preset_to_ui).pack(side='left')
     
-    def create_backups_tab(self):
+    def create_backups_tab(self, tab):
         """Вкладка управления бэкапами"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text='Бэкапы')
-        
         # Верхняя панель с кнопками
         top_frame = ttk.Frame(tab)
         top_frame.pack(fill='x', padx=20, pady=10)
@@ -294,7 +401,8 @@ class SSHConfiguratorGUI:
         
         # Создаем Treeview для отображения бэкапов
         columns = ('name', 'date', 'size', 'comment')
-        self.backup_tree = ttk.Treeview(frame, columns=columns, show='headings')
+        self.backup_tree = ttk.Treeview(frame, columns=columns, show='headings',
+                                        displaycolumns=columns, selectmode='extended')
         
         # Настраиваем заголовки
         self.backup_tree.heading('name', text='Имя файла')
@@ -302,11 +410,11 @@ class SSHConfiguratorGUI:
         self.backup_tree.heading('size', text='Размер')
         self.backup_tree.heading('comment', text='Комментарий')
         
-        # Настраиваем колонки
-        self.backup_tree.column('name', width=250)
-        self.backup_tree.column('date', width=150)
-        self.backup_tree.column('size', width=80)
-        self.backup_tree.column('comment', width=200)
+        # Настраиваем колонки (при изменении размера растягивается только комментарий)
+        self.backup_tree.column('name', width=250, stretch=False)
+        self.backup_tree.column('date', width=150, stretch=False)
+        self.backup_tree.column('size', width=80, stretch=False)
+        self.backup_tree.column('comment', width=200, stretch=True)
         
         # Добавляем скроллбар
         scrollbar = ttk.Scrollbar(frame, orient='vertical', 
@@ -324,12 +432,13 @@ class SSHConfiguratorGUI:
                   command=self.restore_selected_backup).pack(side='left', padx=(0, 10))
         ttk.Button(bottom_frame, text='Удалить выделенный',
                   command=self.delete_selected_backup).pack(side='left')
+        
+        # Заполняем списком, загруженным до открытия вкладки
+        self._populate_backups(self._pending_backup_rows)
+        self._pending_backup_rows = None
     
-    def create_status_tab(self):
+    def create_status_tab(self, tab):
         """Вкладка статуса системы"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text='Статус')
-        
         # Заголовок
         ttk.Label(tab, text='Статус системы',
                  style='Title.TLabel').pack(pady=(10, 20))
@@ -338,7 +447,6 @@ class SSHConfiguratorGUI:
         status_frame = ttk.LabelFrame(tab, text='Статус службы SSH', padding=10)
         status_frame.pack(fill='x', padx=20, pady=10)
         
-        self.service_status_var = tk.StringVar(value='Проверка...')
         ttk.Label(status_frame, textvariable=self.service_status_var,
                  font=('Helvetica', 12)).pack()
         
@@ -358,6 +466,10 @@ class SSHConfiguratorGUI:
         self.config_text = scrolledtext.ScrolledText(config_frame, height=20)
         self.config_text.pack(fill='both', expand=True)
         self.config_text.config(state='disabled')
+        
+        # Отображаем конфигурацию, загруженную до открытия вкладки
+        self._config_display_cache = None
+        self.update_config_display()
     
     def create_status_bar(self):
         """Создание статусной строки"""
@@ -396,26 +508,36 @@ class SSHConfiguratorGUI:
         # Загружаем в отдельном потоке
         def load_thread():
             try:
-                # Загружаем текущую конфигурацию
-                self.current_config = self.manager.read_current_config()
+                # Загружаем конфигурацию и список бэкапов одним вызовом
+                self.current_config, backups = self.manager.read_state()
+                rows = self._format_backup_rows(backups)
                 
-                # Обновляем интерфейс
-                self.root.after(0, self.update_ui_from_config)
-                
-                # Обновляем список бэкапов
-                self.root.after(0, self.refresh_backups)
-                
-                # Проверяем статус службы
-                self.root.after(0, self.check_service_status)
+                # Обновляем интерфейс за один проход цикла событий
+                self._ui(self._on_initial_load_done, rows)
                 
                 self.set_status("Готов")
                 
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror(
-                    "Ошибка", f"Не удалось загрузить данные: {str(e)}"))
+                self._ui(messagebox.showerror,
+                         "Ошибка", f"Не удалось загрузить данные: {str(e)}")
                 self.set_status("Ошибка загрузки")
         
-        threading.Thread(target=load_thread, daemon=True).start()
+        self._executor.submit(load_thread)
+    
+    def _on_initial_load_done(self, backup_rows):
+        """Обновление интерфейса после загрузки данных"""
+        self.update_ui_from_config()
+        self._populate_backups(backup_rows)
+        self.check_service_status()
+        
+        # Дальше статус службы и список бэкапов обновляются периодически
+        self.root.after(self._poll_interval, self._poll)
+    
+    def _poll(self):
+        """Периодическое обновление статуса службы и списка бэкапов"""
+        self.check_service_status()
+        self.refresh_backups()
+        self.root.after(self._poll_interval, self._poll)
     
     def update_ui_from_config(self):
         """Обновление интерфейса из текущей конфигурации"""
@@ -423,51 +545,98 @@ class SSHConfiguratorGUI:
             return
         
         try:
-            # Основные настройки
-            self.port_var.set(self.current_config.get('Port', '22'))
-            self.root_login_var.set(self.current_config.get('PermitRootLogin', 'prohibit-password'))
-            
-            # Методы аутентификации
-            pass_auth = self.current_config.get('PasswordAuthentication', 'yes')
-            self.password_auth_var.set(pass_auth == 'yes')
-            
-            pubkey_auth = self.current_config.get('PubkeyAuthentication', 'yes')
-            self.pubkey_auth_var.set(pubkey_auth == 'yes')
-            
-            # X11
-            self.x11_var.set(self.current_config.get('X11Forwarding', 'yes'))
-            
-            # Безопасность
-            self.max_auth_var.set(self.current_config.get('MaxAuthTries', '6'))
-            self.login_grace_var.set(self.current_config.get('LoginGraceTime', '120'))
-            self.keepalive_var.set(self.current_config.get('ClientAliveInterval', '0'))
-            self.allowed_users_var.set(self.current_config.get('AllowUsers', ''))
-            self.allowed_groups_var.set(self.current_config.get('AllowGroups', ''))
+            # Недостающие в конфигурации ключи получают значения по умолчанию
+            self._apply_to_ui({**self.UI_DEFAULTS, **self.current_config})
             
             # Обновляем вкладку статуса
             self.update_config_display()
             
         except Exception as e:
-            print(f"Ошибка обновления UI: {e}")
+            log.debug("Ошибка обновления UI: %s", e)
+    
+    def _apply_to_ui(self, settings):
+        """Перенос настроек sshd в переменные интерфейса"""
+        for key, value in settings.items():
+            setter = self._ui_setters.get(key)
+            if setter:
+                setter(value)
+    
+    @staticmethod
+    def _set_if_changed(var, value):
+        """Установка значения Tk-переменной только при его изменении"""
+        if var.get() != value:
+            var.set(value)
     
     def update_config_display(self):
         """Обновление отображения конфигурации"""
-        if not self.current_config:
+        if not self.current_config or self.config_text is None:
             return
         
-        self.config_text.config(state='normal')
-        self.config_text.delete(1.0, tk.END)
+        # Конфигурация не менялась - текст уже отображен
+        key = id(self.current_config)
+        if self._config_display_cache and self._config_display_cache[0] == key:
+            return
         
         # Форматируем конфигурацию для отображения
-        lines = []
-        for key, value in sorted(self.current_config.items()):
-            lines.append(f"{key}: {value}")
+        text = "\n".join(f"{k}: {v}" for k, v in sorted(self.current_config.items()))
+        self._config_display_cache = (key, text)
         
-        self.config_text.insert(1.0, "\n".join(lines))
+        self.config_text.config(state='normal')
+        self.config_text.delete(1.0, tk.END)
+        self.config_text.insert(1.0, text)
         self.config_text.config(state='disabled')
     
+    def _run_background(self, name, fn):
+        """
+        Запуск пользовательской операции в общем пуле потоков
+        
+        Повторный запуск операции, которая еще выполняется, игнорируется.
+        
+        Args:
+            name: Имя операции
+            fn: Функция, выполняемая в фоне
+        """
+        if name in self._busy:
+            self.set_status("Операция уже выполняется...")
+            return
+        
+        self._busy.add(name)
+        future = self._executor.submit(fn)
+        future.add_done_callback(
+            lambda f: self._ui(self._busy.discard, name))
+    
+    def _ui(self, fn, *args):
+        """
+        Вызов функции в потоке интерфейса
+        
+        Аргументы вычисляются сразу, в вызывающем (фоновом) потоке.
+        """
+        self.root.after(0, fn, *args)
+    
+    def on_close(self):
+        """Закрытие главного окна"""
+        self._executor.shutdown(wait=False)
+        self.root.destroy()
+    
     def set_status(self, message):
-        """Установка сообщения в статусной строке"""
+        """
+        Установка сообщения в статусной строке
+        
+        Может вызываться из фоновых потоков: частые обновления объединяются,
+        и на экран попадает только последнее сообщение за проход цикла событий.
+        """
+        with self._status_lock:
+            scheduled = self._pending_status is not None
+            self._pending_status = message
+        
+        if not scheduled:
+            self.root.after_idle(self._flush_status)
+    
+    def _flush_status(self):
+        """Отрисовка последнего сообщения статусной строки"""
+        with self._status_lock:
+            message, self._pending_status = self._pending_status, None
+        
         self.status_label.config(text=message)
     
     def save_basic_settings(self):
@@ -516,28 +685,31 @@ class SSHConfiguratorGUI:
                 )
                 
                 if result['status'] == 'success':
-                    self.root.after(0, lambda: messagebox.showinfo(
-                        "Успех", "Настройки успешно применены!"))
-                    
                     # Обновляем текущую конфигурацию
                     self.current_config = self.manager.read_current_config()
-                    self.root.after(0, self.update_config_display)
-                    
-                    # Предлагаем перезапустить службу
-                    self.root.after(0, lambda: self.ask_restart_service())
+                    self._ui(self._on_settings_applied)
                     
                 else:
-                    self.root.after(0, lambda: messagebox.showerror(
-                        "Ошибка", "Не удалось применить настройки"))
+                    self._ui(messagebox.showerror,
+                             "Ошибка", "Не удалось применить настройки")
                 
                 self.set_status("Готов")
                 
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror(
-                    "Ошибка", f"Ошибка при применении настроек:\n{str(e)}"))
+                self._ui(messagebox.showerror,
+                         "Ошибка", f"Ошибка при применении настроек:\n{str(e)}")
                 self.set_status("Ошибка")
         
-        threading.Thread(target=apply_thread, daemon=True).start()
+        self._run_background('apply', apply_thread)
+    
+    def _on_settings_applied(self):
+        """Обновление интерфейса после применения настроек"""
+        self._config_display_cache = None
+        messagebox.showinfo("Успех", "Настройки успешно применены!")
+        self.update_config_display()
+        
+        # Предлагаем перезапустить службу
+        self.ask_restart_service()
     
     def ask_restart_service(self):
         """Запрос на перезапуск службы"""
@@ -547,14 +719,8 @@ class SSHConfiguratorGUI:
     
     def on_preset_selected(self, event):
         """Обработка выбора пресета"""
-        selection = self.preset_combo.get()
-        if not selection:
-            return
-        
-        # Извлекаем ключ пресета из строки
-        preset_key = selection.split('(')[-1].strip(')')
-        preset = self.presets.get(preset_key)
-        
+        label = self.preset_combo.get()
+        preset = self._preset_by_label.get(label)
         if not preset:
             return
         
@@ -567,10 +733,7 @@ class SSHConfiguratorGUI:
         # Обновляем предпросмотр
         self.preset_preview.config(state='normal')
         self.preset_preview.delete(1.0, tk.END)
-        
-        for key, value in preset['settings'].items():
-            self.preset_preview.insert(tk.END, f"{key}: {value}\n")
-        
+        self.preset_preview.insert(1.0, self._preset_preview_cache[label])
         self.preset_preview.config(state='disabled')
     
     def apply_preset(self):
@@ -580,10 +743,7 @@ class SSHConfiguratorGUI:
             messagebox.showwarning("Предупреждение", "Выберите пресет")
             return
         
-        # Извлекаем ключ пресета
-        preset_key = selection.split('(')[-1].strip(')')
-        preset = self.presets.get(preset_key)
-        
+        preset = self._preset_by_label.get(selection)
         if not preset:
             messagebox.showerror("Ошибка", "Пресет не найден")
             return
@@ -600,34 +760,11 @@ class SSHConfiguratorGUI:
             messagebox.showwarning("Предупреждение", "Выберите пресет")
             return
         
-        # Извлекаем ключ пресета
-        preset_key = selection.split('(')[-1].strip(')')
-        preset = self.presets.get(preset_key)
-        
+        preset = self._preset_by_label.get(selection)
         if not preset:
             return
         
-        settings = preset['settings']
-        
-        # Обновляем основные настройки
-        if 'Port' in settings:
-            self.port_var.set(settings['Port'])
-        if 'PermitRootLogin' in settings:
-            self.root_login_var.set(settings['PermitRootLogin'])
-        if 'PasswordAuthentication' in settings:
-            self.password_auth_var.set(settings['PasswordAuthentication'] == 'yes')
-        if 'PubkeyAuthentication' in settings:
-            self.pubkey_auth_var.set(settings['PubkeyAuthentication'] == 'yes')
-        if 'X11Forwarding' in settings:
-            self.x11_var.set(settings['X11Forwarding'])
-        
-        # Обновляем настройки безопасности
-        if 'MaxAuthTries' in settings:
-            self.max_auth_var.set(settings['MaxAuthTries'])
-        if 'LoginGraceTime' in settings:
-            self.login_grace_var.set(settings['LoginGraceTime'])
-        if 'ClientAliveInterval' in settings:
-            self.keepalive_var.set(settings['ClientAliveInterval'])
+        self._apply_to_ui(preset['settings'])
         
         messagebox.showinfo("Успех", "Настройки пресета загружены в интерфейс")
     
@@ -643,49 +780,92 @@ class SSHConfiguratorGUI:
         def backup_thread():
             try:
                 backup_path = self.manager.create_backup(comment or "Ручное создание")
-                self.root.after(0, lambda: messagebox.showinfo(
-                    "Успех", f"Бэкап создан:\n{backup_path}"))
-                self.root.after(0, self.refresh_backups)
+                self._ui(messagebox.showinfo,
+                         "Успех", f"Бэкап создан:\n{backup_path}")
+                self._ui(self.refresh_backups)
                 self.set_status("Готов")
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror(
-                    "Ошибка", f"Ошибка создания бэкапа:\n{str(e)}"))
+                self._ui(messagebox.showerror,
+                         "Ошибка", f"Ошибка создания бэкапа:\n{str(e)}")
                 self.set_status("Ошибка")
         
-        threading.Thread(target=backup_thread, daemon=True).start()
+        self._run_background('backup', backup_thread)
     
     def refresh_backups(self):
         """Обновление списка бэкапов"""
         def refresh_thread():
             try:
-                backups = self.manager.list_backups()
-                self.backup_list = backups
-                
-                self.root.after(0, self.update_backup_list)
-                self.set_status("Готов")
+                rows = self._format_backup_rows(self.manager.list_backups())
+                self._ui(self._populate_backups, rows)
             except Exception as e:
-                self.root.after(0, lambda: print(f"Ошибка обновления бэкапов: {e}"))
+                log.debug("Ошибка обновления бэкапов: %s", e)
         
-        threading.Thread(target=refresh_thread, daemon=True).start()
-    
-    def update_backup_list(self):
-        """Обновление списка бэкапов в Treeview"""
-        # Очищаем текущий список
-        for item in self.backup_tree.get_children():
-            self.backup_tree.delete(item)
+        if self._refresh_pending:
+            return
         
-        # Добавляем бэкапы
-        for backup in self.backup_list:
-            size_kb = backup['size'] / 1024
-            date_str = backup['modified'].strftime("%Y-%m-%d %H:%M")
-            comment = backup['meta'].get('comment', '')
-            
-            self.backup_tree.insert('', 'end', values=(
+        self._refresh_pending = True
+        future = self._executor.submit(refresh_thread)
+        future.add_done_callback(lambda f: self._ui(self._clear_refresh_pending))
+    
+    def _clear_refresh_pending(self):
+        """Снятие отметки о выполняющемся обновлении списка бэкапов"""
+        self._refresh_pending = False
+    
+    @staticmethod
+    def _format_backup_rows(backups):
+        """Подготовка строк Treeview из списка бэкапов (вызывается в фоновом потоке)"""
+        return {
+            backup['path']: (
                 backup['name'],
-                date_str,
-                f"{size_kb:.1f} KB",
-                comment
-            ))
+                backup['date_str'],
+                backup['size_str'],
+                backup['meta'].get('comment', '')
+            )
+            for backup in backups
+        }
+    
+    def _populate_backups(self, new):
+        """
+        Обновление списка бэкапов в Treeview
+        
+        Args:
+            new: Строки бэкапов {путь: значения колонок}
+        """
+        if self.backup_tree is None:
+            # Вкладка еще не открывалась - заполним ее при построении
+            self._pending_backup_rows = new
+            return
+        
+        old = self._backup_rows
+        
+        # Применяем только изменения относительно кэша
+        to_delete = old.keys() - new.keys()
+        to_add = new.keys() - old.keys()
+        to_update = {path for path in old.keys() & new.keys()
+                     if old[path][1] != new[path]}
+        
+        if to_delete:
+            self.backup_tree.delete(*[old.pop(path)[0] for path in to_delete])
+        
+        for path in to_update:
+            iid = old[path][0]
+            self.backup_tree.item(iid, values=new[path])
+            old[path] = (iid, new[path])
+        
+        for path in to_add:
+            iid = self.backup_tree.insert('', 'end', iid=path, values=new[path])
+            old[path] = (iid, new[path])
+        
+        # Восстанавливаем порядок (новые бэкапы сверху)
+        if to_add:
+            for index, path in enumerate(new):
+                self.backup_tree.move(old[path][0], '', index)
+    
+    def _forget_backup_row(self, path):
+        """Удаление строки бэкапа из Treeview и кэша"""
+        row = self._backup_rows.pop(path, None)
+        if row and self.backup_tree.exists(row[0]):
+            self.backup_tree.delete(row[0])
     
     def restore_selected_backup(self):
         """Восстановление выделенного бэкапа"""
@@ -693,21 +873,14 @@ class SSHConfiguratorGUI:
         if not selection:
             messagebox.showwarning("Предупреждение", "Выберите бэкап для восстановления")
             return
-        
-        item = self.backup_tree.item(selection[0])
-        backup_name = item['values'][0]
-        
-        # Находим полный путь к бэкапу
-        backup_path = None
-        for backup in self.backup_list:
-            if backup['name'] == backup_name:
-                backup_path = backup['path']
-                break
-        
-        if not backup_path:
-            messagebox.showerror("Ошибка", "Бэкап не найден")
+        if len(selection) > 1:
+            messagebox.showwarning("Предупреждение", "Выберите один бэкап для восстановления")
             return
         
+        # iid строки - полный путь к бэкапу, имя берем из кэша строк
+        backup_path = selection[0]
+        backup_name = self._backup_rows[backup_path][1][0]
+        
         if messagebox.askyesno("Восстановление",
                               f"Восстановить конфигурацию из бэкапа?\n\n"
                               f"{backup_name}\n\n"
@@ -719,88 +892,123 @@ class SSHConfiguratorGUI:
                     result = self.manager.restore_backup(backup_path)
                     
                     if result['status'] == 'success':
-                        self.root.after(0, lambda: messagebox.showinfo(
-                            "Успех", "Конфигурация восстановлена!"))
-                        
                         # Обновляем данные
                         self.current_config = self.manager.read_current_config()
-                        self.root.after(0, self.update_ui_from_config)
-                        self.root.after(0, self.refresh_backups)
-                        
-                        # Предлагаем перезапустить службу
-                        self.root.after(0, lambda: self.ask_restart_service())
+                        self._ui(self._on_backup_restored)
                     else:
-                        self.root.after(0, lambda: messagebox.showerror(
-                            "Ошибка", "Не удалось восстановить бэкап"))
+                        self._ui(messagebox.showerror,
+                                 "Ошибка", "Не удалось восстановить бэкап")
                     
                     self.set_status("Готов")
                     
                 except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror(
-                        "Ошибка", f"Ошибка восстановления:\n{str(e)}"))
+                    self._ui(messagebox.showerror,
+                             "Ошибка", f"Ошибка восстановления:\n{str(e)}")
                     self.set_status("Ошибка")
             
-            threading.Thread(target=restore_thread, daemon=True).start()
+            self._run_background('restore', restore_thread)
+    
+    def _on_backup_restored(self):
+        """Обновление интерфейса после восстановления бэкапа"""
+        self._config_display_cache = None
+        messagebox.showinfo("Успех", "Конфигурация восстановлена!")
+        self.update_ui_from_config()
+        self.refresh_backups()
+        
+        # Предлагаем перезапустить службу
+        self.ask_restart_service()
     
     def delete_selected_backup(self):
-        """Удаление выделенного бэкапа"""
+        """Удаление выделенных бэкапов"""
         selection = self.backup_tree.selection()
         if not selection:
             messagebox.showwarning("Предупреждение", "Выберите бэкап для удаления")
             return
         
-        item = self.backup_tree.item(selection[0])
-        backup_name = item['values'][0]
+        # iid строк - полные пути к бэкапам, имена берем из кэша строк
+        backup_paths = list(selection)
+        backup_names = [self._backup_rows[path][1][0] for path in backup_paths]
         
         if messagebox.askyesno("Удаление",
-                              f"Удалить бэкап?\n\n{backup_name}"):
+                              f"Удалить бэкапы ({len(backup_names)})?\n\n"
+                              + "\n".join(backup_names)):
             self.set_status("Удаление бэкапа...")
             
             def delete_thread():
                 try:
-                    # Находим и удаляем файлы бэкапа
-                    import os
-                    for backup in self.backup_list:
-                        if backup['name'] == backup_name:
-                            os.remove(backup['path'])
-                            meta_file = backup['path'] + '.meta'
-                            if os.path.exists(meta_file):
-                                os.remove(meta_file)
-                            break
+                    self.manager.delete_backups(backup_names)
+                    for path in backup_paths:
+                        self._ui(self._forget_backup_row, path)
                     
-                    self.root.after(0, lambda: messagebox.showinfo(
-                        "Успех", "Бэкап удален"))
-                    self.root.after(0, self.refresh_backups)
+                    self._ui(messagebox.showinfo,
+                             "Успех", "Бэкап удален" if len(backup_names) == 1 else "Бэкапы удалены")
+                    self._ui(self.refresh_backups)
                     self.set_status("Готов")
                     
                 except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror(
-                        "Ошибка", f"Ошибка удаления:\n{str(e)}"))
+                    self._ui(messagebox.showerror,
+                             "Ошибка", f"Ошибка удаления:\n{str(e)}")
                     self.set_status("Ошибка")
             
-            threading.Thread(target=delete_thread, daemon=True).start()
+            self._run_background('delete', delete_thread)
     
     def check_service_status(self):
         """Проверка статуса службы"""
-        def check_thread():
-            try:
-                status = self.manager.get_service_status()
-                status_text = {
-                    'active': 'Активна',
-                    'inactive': 'Неактивна',
-                    'failed': 'Ошибка',
-                    'unknown': 'Неизвестно'
-                }.get(status, f' {status}')
-                
-                self.root.after(0, lambda: self.service_status_var.set(
-                    f"Статус: {status_text}"))
-                self.set_status("Готов")
-            except Exception as e:
-                self.root.after(0, lambda: self.service_status_var.set(
-                    f"Ошибка: {str(e)}"))
-                self.set_status("Ошибка")
+        # Предыдущая проверка еще не завершилась
+        if self._status_check_pending:
+            return
         
-        threading.Thread(target=check_thread, daemon=True).start()
+        # systemctl отрабатывает быстро, поэтому ждем его из цикла событий Tk,
+        # а не в отдельном потоке
+        try:
+            process = self.manager.start_status_check()
+        except OSError:
+            # systemctl недоступен; проверка периодическая, поэтому статусную
+            # строку не трогаем, чтобы не затирать сообщения о действиях
+            self._show_service_status('unknown')
+            return
+        
+        if process is None:
+            # Статус читается через D-Bus, а при ошибке - через systemctl;
+            # и то и другое блокирует, поэтому выполняем в рабочем потоке
+            def status_thread():
+                try:
+                    status = self.manager.get_service_status()
+                except Exception:
+                    status = 'unknown'
+                self._ui(self._finish_status_check, status)
+            
+            self._status_check_pending = True
+            self._executor.submit(status_thread)
+        else:
+            self._status_check_pending = True
+            self.root.after(50, self._poll_service, process)
+    
+    def _poll_service(self, process):
+        """Ожидание завершения systemctl без блокировки интерфейса"""
+        if process.poll() is None:
+            self.root.after(50, self._poll_service, process)
+            return
+        
+        output = process.stdout.read().strip()
+        process.stdout.close()
+        self._finish_status_check(output if process.returncode == 0 else 'unknown')
+    
+    def _finish_status_check(self, status):
+        """Завершение проверки статуса службы"""
+        self._status_check_pending = False
+        self._show_service_status(status)
+    
+    def _show_service_status(self, status):
+        """Отображение статуса службы"""
+        status_text = {
+            'active': 'Активна',
+            'inactive': 'Неактивна',
+            'failed': 'Ошибка',
+            'unknown': 'Неизвестно'
+        }.get(status, f' {status}')
+        
+        self._set_if_changed(self.service_status_var, f"Статус: {status_text}")
     
     def restart_service(self):
         """Перезапуск службы SSH"""
@@ -813,21 +1021,21 @@ class SSHConfiguratorGUI:
                     result = self.manager.restart_service()
                     
                     if result['status'] == 'success':
-                        self.root.after(0, lambda: messagebox.showinfo(
-                            "Успех", "Служба перезапущена"))
-                        self.root.after(0, self.check_service_status)
+                        self._ui(messagebox.showinfo,
+                                 "Успех", "Служба перезапущена")
+                        self._ui(self.check_service_status)
                     else:
-                        self.root.after(0, lambda: messagebox.showerror(
-                            "Ошибка", f"Не удалось перезапустить службу:\n{result['message']}"))
+                        self._ui(messagebox.showerror,
+                                 "Ошибка", f"Не удалось перезапустить службу:\n{result['message']}")
                     
                     self.set_status("Готов")
                     
                 except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror(
-                        "Ошибка", f"Ошибка перезапуска:\n{str(e)}"))
+                    self._ui(messagebox.showerror,
+                             "Ошибка", f"Ошибка перезапуска:\n{str(e)}")
                     self.set_status("Ошибка")
             
-            threading.Thread(target=restart_thread, daemon=True).start()
+            self._run_background('restart', restart_thread)
     
     def apply_all_settings(self):
         """Применение всех настроек из интерфейса"""
@@ -8,8 +8,6 @@ SSH Daemon Configurator for Linux
 
 import sys
 import os
-import tkinter as tk
-from tkinter import messagebox
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -36,8 +34,10 @@ def main():
         if answer.lower() != 'y':
             sys.exit(1)
     
-    # Импортируем наши модули
+    # Импортируем Tk и наши модули только после проверок выше
     try:
+        import tkinter as tk
+        from tkinter import messagebox
         from ssh_manager import SSHConfigManager
         from presets import PRESETS
         from gui import SSHConfiguratorGUI
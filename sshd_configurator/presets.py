@@ -5,6 +5,8 @@
 Готовые пресеты настроек для SSH
 """
 
+from types import MappingProxyType
+
 PRESETS = {
     'hardened': {
         'name': 'Усиленная безопасность',
@@ -82,6 +84,17 @@ PRESETS = {
     }
 }
 
+# Пресеты неизменяемы: вызывающий код не может случайно испортить общие данные
+PRESETS = MappingProxyType({
+    key: MappingProxyType(dict(preset, settings=MappingProxyType(preset['settings'])))
+    for key, preset in PRESETS.items()
+})
+
+_EMPTY = MappingProxyType({})
+
+# Настройки по имени пресета - один поиск в get_preset
+_SETTINGS_BY_NAME = MappingProxyType({key: preset['settings'] for key, preset in PRESETS.items()})
+
 def get_preset(name):
     """
     Получение пресета по имени
@@ -90,10 +103,9 @@ def get_preset(name):
         name: Имя пресета
         
     Returns:
-        dict: Настройки пресета или пустой словарь
+        Mapping: Настройки пресета (только для чтения) или пустой словарь
     """
-    preset = PRESETS.get(name, {})
-    return preset.get('settings', {})
+    return _SETTINGS_BY_NAME.get(name, _EMPTY)
 
 def get_preset_info(name):
     """
@@ -129,11 +141,7 @@ def format_preset_settings(settings):
     if not settings:
         return "Нет настроек"
     
-    lines = []
-    for key, value in sorted(settings.items()):
-        lines.append(f"{key:25} {value}")
-    
-    return "\n".join(lines)
+    return "\n".join(f"{key:25} {value}" for key, value in sorted(settings.items()))
 
 # Тестирование
 if __name__ == "__main__":
@@ -9,14 +9,73 @@ from pathlib import Path
 import sys
 import pwd
 import grp
+import hashlib
+import itertools
 import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import itemgetter
+
+# Необязательная зависимость: статус службы через D-Bus без запуска systemctl
+try:
+    from pystemd.systemd1 import Unit as SystemdUnit
+except ImportError:
+    SystemdUnit = None
+
+# Необязательная зависимость: быстрый JSON для метаинформации бэкапов
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dump_json(obj):
+    """Компактная сериализация в UTF-8 (файлы читает только программа)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _load_json(data):
+    """Разбор JSON из байтов"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 class SSHConfigError(Exception):
     """Кастомное исключение для ошибок конфигурации SSH"""
     pass
 
 class SSHConfigManager:
+    # Допустимые значения директив
+    _YES_NO = frozenset({'yes', 'no'})
+    _ALLOWED = {
+        'PermitRootLogin': frozenset({'yes', 'no', 'prohibit-password',
+                                      'without-password', 'forced-commands-only'}),
+        'PasswordAuthentication': _YES_NO,
+        'PubkeyAuthentication': _YES_NO,
+        'X11Forwarding': _YES_NO,
+    }
+    
+    # Числовые директивы: (минимум, максимум или None)
+    _NUMERIC = {
+        'Port': (1, 65535),
+        'ClientAliveInterval': (0, None),
+        'MaxAuthTries': (1, None),
+        'LoginGraceTime': (0, None),
+    }
+    
+    # Время жизни снимка пользователей/групп (секунды)
+    NAME_CACHE_TTL = 5.0
+    
+    # Сколько успешно проверенных конфигураций помнить
+    SYNTAX_CACHE_SIZE = 16
+    
+    # С какого числа бэкапов читать их метаданные параллельно
+    PARALLEL_READ_THRESHOLD = 32
+    
     def __init__(self, config_path="/etc/ssh/sshd_config", test_mode=False):
         """
         Инициализация менеджера конфигурации SSH
@@ -28,6 +87,19 @@ class SSHConfigManager:
         self.config_path = Path(config_path)
         self.backup_dir = Path("/var/backup/sshd_configurator")
         self.test_mode = test_mode
+        # Снимки имен пользователей/групп: ключ -> (время, множество имен)
+        self._name_cache = {}
+        # SHA-256 содержимого конфигураций, успешно прошедших sshd -t (LRU)
+        self._syntax_cache = OrderedDict()
+        # Индекс метаинформации бэкапов (один файл вместо .meta на каждый бэкап)
+        self.meta_index_path = self.backup_dir / "index.json"
+        self._meta_lock = threading.Lock()
+        # Сериализует apply_settings и restore_backup из рабочих потоков GUI
+        self._config_lock = threading.Lock()
+        # Пул для параллельного чтения метаданных бэкапов (потоки создаются по требованию)
+        self._io_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='ssh-io')
+        # Имя unit-а службы SSH, определяется при первом обращении
+        self._service_name = None
         
         if not test_mode:
             self._ensure_privileges()
@@ -57,22 +129,14 @@ class SSHConfigManager:
         if not self.config_path.exists():
             raise SSHConfigError(f"Файл {self.config_path} не найден!")
         
-        directives = {}
-        
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    
-                    # Пропускаем пустые строки и комментарии
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    # Обработка директив
-                    parts = line.split(None, 1)
-                    if len(parts) == 2:
-                        key, value = parts
-                        directives[key] = value
+            data = self.config_path.read_text(encoding='utf-8', errors='replace')
+            
+            # Пропускаем пустые строки и комментарии, разбираем директивы
+            lines = (line.strip() for line in data.splitlines())
+            pairs = (line.split(None, 1) for line in lines
+                     if line and not line.startswith('#'))
+            directives = {parts[0]: parts[1] for parts in pairs if len(parts) == 2}
         
         except Exception as e:
             raise SSHConfigError(f"Ошибка чтения конфигурации: {e}")
@@ -81,25 +145,23 @@ class SSHConfigManager:
     
     def validate_setting(self, key, value):
         """Валидация значения настройки"""
-        validators = {
-            'Port': lambda v: v.isdigit() and 1 <= int(v) <= 65535,
-            'PermitRootLogin': lambda v: v in ['yes', 'no', 'prohibit-password', 
-                                               'without-password', 'forced-commands-only'],
-            'PasswordAuthentication': lambda v: v in ['yes', 'no'],
-            'PubkeyAuthentication': lambda v: v in ['yes', 'no'],
-            'X11Forwarding': lambda v: v in ['yes', 'no'],
-            'ClientAliveInterval': lambda v: v.isdigit() and int(v) >= 0,
-            'MaxAuthTries': lambda v: v.isdigit() and int(v) > 0,
-            'LoginGraceTime': lambda v: v.isdigit() and int(v) >= 0,
-        }
+        allowed = self._ALLOWED.get(key)
+        if allowed is not None and value not in allowed:
+            raise ValueError(f"Некорректное значение для {key}: {value}")
         
-        if key in validators:
-            if not validators[key](value):
+        bounds = self._NUMERIC.get(key)
+        if bounds is not None:
+            low, high = bounds
+            if not value.isdigit() or int(value) < low or (high is not None and int(value) > high):
                 raise ValueError(f"Некорректное значение для {key}: {value}")
         
         # Специальная валидация для AllowUsers/AllowGroups
         if key in ['AllowUsers', 'AllowGroups']:
+            known = self._known_names(key)
             for item in value.split():
+                if item in known:
+                    continue
+                # Снимок NSS может быть неполным (например, LDAP без перечисления)
                 if key == 'AllowUsers':
                     try:
                         pwd.getpwnam(item)
@@ -113,6 +175,32 @@ class SSHConfigManager:
         
         return True
     
+    def _known_names(self, key):
+        """
+        Снимок имен пользователей или групп системы
+        
+        Один вызов getpwall/getgrall вместо запроса к NSS на каждое имя.
+        Снимок кэшируется на NAME_CACHE_TTL секунд.
+        
+        Args:
+            key: 'AllowUsers' или 'AllowGroups'
+            
+        Returns:
+            set: Множество имен
+        """
+        now = time.monotonic()
+        cached = self._name_cache.get(key)
+        if cached and now - cached[0] < self.NAME_CACHE_TTL:
+            return cached[1]
+        
+        if key == 'AllowUsers':
+            names = {entry.pw_name for entry in pwd.getpwall()}
+        else:
+            names = {entry.gr_name for entry in grp.getgrall()}
+        
+        self._name_cache[key] = (now, names)
+        return names
+    
     def create_backup(self, comment=""):
         """
         Создание резервной копии конфигурации
@@ -134,10 +222,12 @@ class SSHConfigManager:
             backup_name = f"sshd_config_{timestamp}_{safe_comment}" if comment else f"sshd_config_{timestamp}"
             backup_path = self.backup_dir / backup_name
             
-            # Копируем файл
-            shutil.copy2(self.config_path, backup_path)
+            # Копируем только содержимое (в Linux - в ядре через sendfile):
+            # время и xattr оригинала бэкапу не нужны
+            shutil.copyfile(self.config_path, backup_path)
+            os.chmod(backup_path, 0o600)
             
-            # Создаем файл с метаинформацией
+            # Сохраняем метаинформацию в общий индекс бэкапов
             meta = {
                 'timestamp': timestamp,
                 'original_path': str(self.config_path),
@@ -145,8 +235,10 @@ class SSHConfigManager:
                 'user': os.getenv('SUDO_USER', 'root')
             }
             
-            with open(f"{backup_path}.meta", 'w') as f:
-                json.dump(meta, f, indent=2, ensure_ascii=False)
+            with self._meta_lock:
+                index = self._load_meta_index(quarantine=True)
+                index[backup_name] = meta
+                self._save_meta_index(index)
             
             print(f"Создан бэкап: {backup_path}")
             return str(backup_path)
@@ -170,73 +262,80 @@ class SSHConfigManager:
             print(f"[TEST] Применение настроек: {settings}")
             return {'status': 'test', 'applied': settings}
         
-        try:
-            # Валидация всех настроек
-            for key, value in settings.items():
-                self.validate_setting(key, value)
-            
-            # Создание бэкапа
-            backup_path = None
-            if create_backup:
-                backup_path = self.create_backup(backup_comment)
-            
-            # Читаем текущий конфиг
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            updated_lines = []
-            updated_keys = set()
-            
-            # Обновляем существующие директивы
-            for line in lines:
-                stripped = line.strip()
+        # Изменения sshd_config выполняются строго по одному
+        with self._config_lock:
+            try:
+                # Валидация всех настроек
+                for key, value in settings.items():
+                    self.validate_setting(key, value)
                 
-                if not stripped or stripped.startswith('#'):
-                    updated_lines.append(line)
-                    continue
+                # Создание бэкапа
+                backup_path = None
+                if create_backup:
+                    backup_path = self.create_backup(backup_comment)
+                
+                # Читаем текущий конфиг
+                text = self.config_path.read_text(encoding='utf-8')
+                
+                updated_keys = set()
                 
-                key = stripped.split()[0]
-                if key in settings:
-                    # Обновляем директиву
-                    indent = line[:len(line) - len(line.lstrip())]
-                    updated_lines.append(f"{indent}{key} {settings[key]}\n")
+                def replace_directive(match):
+                    key = match.group(2)
                     updated_keys.add(key)
-                else:
-                    updated_lines.append(line)
-            
-            # Добавляем новые директивы в конец
-            for key, value in settings.items():
-                if key not in updated_keys:
-                    updated_lines.append(f"\n# Добавлено через SSH Configurator\n{key} {value}\n")
-            
-            # Записываем во временный файл
-            temp_fd, temp_path = tempfile.mkstemp()
-            try:
-                with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-                    f.writelines(updated_lines)
+                    return f"{match.group(1)}{key} {settings[key]}"
                 
-                # Проверяем синтаксис
-                if not self._test_config_syntax(temp_path):
-                    raise SSHConfigError("Ошибка синтаксиса в новой конфигурации")
+                # Обновляем существующие директивы одним проходом регулярного выражения
+                if settings:
+                    pattern = re.compile(
+                        r'(?m)^([ \t]*)(' + '|'.join(map(re.escape, settings)) + r')(?=[ \t]|$)[^\n]*$'
+                    )
+                    text = pattern.sub(replace_directive, text)
                 
-                # Копируем на место
-                shutil.copy2(temp_path, self.config_path)
+                # Добавляем новые директивы в конец
+                additions = [f"\n# Добавлено через SSH Configurator\n{key} {value}\n"
+                             for key, value in settings.items() if key not in updated_keys]
+                text += "".join(additions)
                 
-                # Устанавливаем правильные права
-                os.chmod(self.config_path, 0o600)
+                # Записываем во временный файл рядом с конфигом (та же файловая система)
+                temp_fd, temp_path = tempfile.mkstemp(dir=str(self.config_path.parent),
+                                                      prefix='.sshd_config.tmp')
+                try:
+                    with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                        f.flush()
+                        # Устанавливаем правильные права
+                        os.fchmod(f.fileno(), 0o600)
+                        os.fsync(f.fileno())
+                    
+                    # Проверяем синтаксис (уже проверенное содержимое не проверяем повторно)
+                    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                    if digest in self._syntax_cache:
+                        self._syntax_cache.move_to_end(digest)
+                    elif self._test_config_syntax(temp_path):
+                        self._syntax_cache[digest] = True
+                        if len(self._syntax_cache) > self.SYNTAX_CACHE_SIZE:
+                            self._syntax_cache.popitem(last=False)
+                    else:
+                        raise SSHConfigError("Ошибка синтаксиса в новой конфигурации")
+                    
+                    # Атомарно заменяем конфиг
+                    os.replace(temp_path, self.config_path)
+                    
+                finally:
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
+                
+                return {
+                    'status': 'success',
+                    'backup': backup_path,
+                    'applied_settings': settings
+                }
                 
+            except Exception as e:
+                raise SSHConfigError(f"Ошибка применения настроек: {e}")
             finally:
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-            
-            return {
-                'status': 'success',
-                'backup': backup_path,
-                'applied_settings': settings
-            }
-            
-        except Exception as e:
-            raise SSHConfigError(f"Ошибка применения настроек: {e}")
+                # Список пользователей и групп мог измениться к следующему применению
+                self._name_cache.clear()
     
     def _test_config_syntax(self, config_path):
         """Проверка синтаксиса конфигурации"""
@@ -260,6 +359,36 @@ class SSHConfigManager:
             print(f"Ошибка при проверке синтаксиса: {e}")
             return False
     
+    def _get_service_name(self):
+        """
+        Имя unit-а службы SSH (ssh в Debian/Ubuntu, sshd в CentOS/RHEL)
+        
+        Определяется одним вызовом systemctl. Кэшируется только успешный
+        результат; пока имя не определено, используется ssh.
+        """
+        if self._service_name is not None:
+            return self._service_name
+        
+        try:
+            result = subprocess.run(
+                ['systemctl', 'list-unit-files', 'ssh.service', 'sshd.service',
+                 '--no-legend'],
+                capture_output=True,
+                text=True
+            )
+            units = [line.split()[0] for line in result.stdout.splitlines() if line.strip()]
+        except Exception:
+            return 'ssh'
+        
+        if 'ssh.service' in units:
+            self._service_name = 'ssh'
+        elif 'sshd.service' in units:
+            self._service_name = 'sshd'
+        else:
+            return 'ssh'
+        
+        return self._service_name
+    
     def restart_service(self):
         """Перезапуск службы sshd"""
         if self.test_mode:
@@ -268,13 +397,13 @@ class SSHConfigManager:
         
         try:
             result = subprocess.run(
-                ['systemctl', 'restart', 'ssh'],
+                ['systemctl', 'restart', self._get_service_name()],
                 capture_output=True,
                 text=True
             )
             
-            if result.returncode != 0:
-                # Пробуем альтернативное имя службы
+            if result.returncode != 0 and self._service_name is None:
+                # Имя службы определить не удалось - пробуем альтернативное
                 result = subprocess.run(
                     ['systemctl', 'restart', 'sshd'],
                     capture_output=True,
@@ -294,25 +423,131 @@ class SSHConfigManager:
         if self.test_mode:
             return "active (test mode)"
         
+        if SystemdUnit is not None:
+            try:
+                return self._get_active_state()
+            except Exception:
+                pass
+        
         try:
             result = subprocess.run(
-                ['systemctl', 'is-active', 'ssh'],
+                ['systemctl', 'is-active', self._get_service_name()],
                 capture_output=True,
                 text=True
             )
             
-            if result.returncode != 0:
-                result = subprocess.run(
-                    ['systemctl', 'is-active', 'sshd'],
-                    capture_output=True,
-                    text=True
-                )
-            
             return result.stdout.strip() if result.returncode == 0 else "unknown"
             
         except Exception:
             return "unknown"
     
+    def _get_active_state(self):
+        """Чтение ActiveState службы через D-Bus (pystemd)"""
+        # Контекстный менеджер загружает unit и закрывает соединение с шиной
+        with SystemdUnit(f"{self._get_service_name()}.service".encode()) as unit:
+            return unit.Unit.ActiveState.decode()
+    
+    def start_status_check(self):
+        """
+        Запуск неблокирующей проверки статуса службы
+        
+        Returns:
+            subprocess.Popen: Процесс systemctl или None, если статус нужно
+            получить через get_service_status в рабочем потоке (тестовый
+            режим, D-Bus)
+        """
+        if self.test_mode or SystemdUnit is not None:
+            return None
+        
+        # Вызывается из потока Tk: имя службы здесь не определяем (это делает
+        # read_state в рабочем потоке), а берем уже известное
+        return subprocess.Popen(
+            ['systemctl', 'is-active', self._service_name or 'ssh'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+    
+    def _load_meta_index(self, quarantine=False):
+        """
+        Чтение индекса метаинформации бэкапов {имя бэкапа: meta}
+        
+        Args:
+            quarantine: Переименовать поврежденный индекс и вернуть пустой,
+                чтобы последующая запись его не затерла (только под _meta_lock)
+                
+        Returns:
+            dict: Индекс метаинформации
+        """
+        try:
+            index = _load_json(self.meta_index_path.read_bytes())
+            if not isinstance(index, dict):
+                raise ValueError("ожидался объект JSON")
+            return index
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            if not quarantine:
+                raise SSHConfigError(f"Индекс бэкапов {self.meta_index_path} поврежден: {e}")
+            
+            broken_path = self.meta_index_path.with_name(
+                f"{self.meta_index_path.name}.broken_{datetime.now():%Y%m%d_%H%M%S}"
+            )
+            os.replace(self.meta_index_path, broken_path)
+            print(f"Индекс бэкапов поврежден ({e}), сохранен как {broken_path}")
+            return {}
+    
+    def _save_meta_index(self, index):
+        """Атомарная запись индекса метаинформации бэкапов"""
+        temp_fd, temp_path = tempfile.mkstemp(dir=str(self.backup_dir), prefix='.index.tmp')
+        try:
+            with os.fdopen(temp_fd, 'wb') as f:
+                f.write(_dump_json(index))
+            os.replace(temp_path, self.meta_index_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def _read_backup_entry(self, file, meta_index):
+        """
+        Чтение информации об одном бэкапе
+        
+        Args:
+            file: Path к файлу бэкапа
+            meta_index: Индекс метаинформации бэкапов
+            
+        Returns:
+            dict: Описание бэкапа или None, если файл исчез до чтения
+        """
+        try:
+            file_stat = file.stat()
+        except OSError:
+            # Бэкап удален между glob и stat (например, параллельным удалением)
+            return None
+        
+        meta = meta_index.get(file.name)
+        
+        # Бэкапы старого формата хранят метаинформацию в отдельном файле .meta
+        if meta is None:
+            meta = {}
+            meta_file = file.with_suffix(file.suffix + '.meta')
+            if meta_file.exists():
+                try:
+                    meta = _load_json(meta_file.read_bytes())
+                except:
+                    pass
+        
+        return {
+            'path': str(file),
+            'name': file.name,
+            'size': file_stat.st_size,
+            'modified_ts': file_stat.st_mtime,
+            'meta': meta,
+            # Готовые строки для отображения
+            'date_str': time.strftime("%Y-%m-%d %H:%M", time.localtime(file_stat.st_mtime)),
+            'size_str': f"{file_stat.st_size / 1024:.1f} KB"
+        }
+    
     def list_backups(self):
         """Получение списка бэкапов"""
         if self.test_mode:
@@ -320,30 +555,84 @@ class SSHConfigManager:
         
         backups = []
         try:
-            for file in self.backup_dir.glob("sshd_config_*"):
-                if file.suffix != '.meta':
-                    meta_file = file.with_suffix(file.suffix + '.meta')
-                    meta = {}
-                    
-                    if meta_file.exists():
-                        try:
-                            with open(meta_file, 'r') as f:
-                                meta = json.load(f)
-                        except:
-                            pass
-                    
-                    file_stat = file.stat()
-                    backups.append({
-                        'path': str(file),
-                        'name': file.name,
-                        'size': file_stat.st_size,
-                        'modified': datetime.fromtimestamp(file_stat.st_mtime),
-                        'meta': meta
-                    })
+            files = [f for f in self.backup_dir.glob("sshd_config_*") if f.suffix != '.meta']
+            try:
+                meta_index = self._load_meta_index()
+            except SSHConfigError as e:
+                # Список показываем и без комментариев; индекс не трогаем
+                print(e)
+                meta_index = {}
+            
+            # Чтение метаданных большого числа бэкапов перекрывается по времени -
+            # полезно на медленных дисках; пул общий на все вызовы
+            if len(files) > self.PARALLEL_READ_THRESHOLD:
+                entries = self._io_executor.map(self._read_backup_entry, files,
+                                                itertools.repeat(meta_index))
+            else:
+                entries = (self._read_backup_entry(f, meta_index) for f in files)
+            backups = [entry for entry in entries if entry is not None]
         except Exception as e:
             print(f"Ошибка при чтении бэкапов: {e}")
         
-        return sorted(backups, key=lambda x: x['modified'], reverse=True)
+        backups.sort(key=itemgetter('modified_ts'), reverse=True)
+        return backups
+    
+    def delete_backups(self, names):
+        """
+        Удаление бэкапов вместе с их метаинформацией
+        
+        Директория бэкапов просматривается один раз для всего списка.
+        
+        Args:
+            names: Имена файлов бэкапов
+            
+        Returns:
+            list: Имена удаленных бэкапов
+        """
+        if self.test_mode:
+            print(f"[TEST] Удаление бэкапов: {names}")
+            return list(names)
+        
+        names = set(names)
+        # Бэкапы старого формата имеют отдельный файл .meta
+        targets = names | {f"{name}.meta" for name in names}
+        removed = []
+        
+        try:
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    if entry.name in targets and entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
+                        if entry.name in names:
+                            removed.append(entry.name)
+            
+            with self._meta_lock:
+                index = self._load_meta_index(quarantine=True)
+                changed = False
+                for name in names:
+                    if index.pop(name, None) is not None:
+                        changed = True
+                if changed:
+                    self._save_meta_index(index)
+                    
+        except Exception as e:
+            raise SSHConfigError(f"Ошибка удаления бэкапа: {e}")
+        
+        return removed
+    
+    def read_state(self):
+        """
+        Чтение конфигурации и списка бэкапов за один вызов
+        
+        Заодно определяет имя службы SSH, чтобы systemctl не запускался
+        для этого синхронно из потока интерфейса.
+        
+        Returns:
+            tuple: (словарь настроек, список бэкапов)
+        """
+        if not self.test_mode:
+            self._get_service_name()
+        return self.read_current_config(), self.list_backups()
     
     def restore_backup(self, backup_path):
         """Восстановление конфигурации из бэкапа"""
@@ -351,25 +640,27 @@ class SSHConfigManager:
             print(f"[TEST] Восстановление из {backup_path}")
             return {'status': 'test', 'restored': True}
         
-        try:
-            backup_path = Path(backup_path)
-            if not backup_path.exists():
-                raise SSHConfigError(f"Бэкап {backup_path} не найден")
-            
-            # Создаем бэкап текущей конфигурации
-            current_backup = self.create_backup("before_restore")
-            
-            # Копируем бэкап
-            shutil.copy2(backup_path, self.config_path)
-            
-            return {
-                'status': 'success',
-                'restored_from': str(backup_path),
-                'current_backup': current_backup
-            }
-            
-        except Exception as e:
-            raise SSHConfigError(f"Ошибка восстановления: {e}")
+        # Изменения sshd_config выполняются строго по одному
+        with self._config_lock:
+            try:
+                backup_path = Path(backup_path)
+                if not backup_path.exists():
+                    raise SSHConfigError(f"Бэкап {backup_path} не найден")
+                
+                # Создаем бэкап текущей конфигурации
+                current_backup = self.create_backup("before_restore")
+                
+                # Копируем бэкап
+                shutil.copy2(backup_path, self.config_path)
+                
+                return {
+                    'status': 'success',
+                    'restored_from': str(backup_path),
+                    'current_backup': current_backup
+                }
+                
+            except Exception as e:
+                raise SSHConfigError(f"Ошибка восстановления: {e}")
 
 # Тестирование класса
 if __name__ == "__main__":